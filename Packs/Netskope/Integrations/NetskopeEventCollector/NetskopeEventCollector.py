@@ -2,8 +2,11 @@ import demistomock as demisto
 from CommonServerPython import *  # noqa # pylint: disable=unused-wildcard-import
 from CommonServerUserPython import *  # noqa
 
+import time
 import urllib3
-from typing import Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, Tuple
 
 # Disable insecure warnings
 urllib3.disable_warnings()  # pylint: disable=no-member
@@ -14,6 +17,14 @@ urllib3.disable_warnings()  # pylint: disable=no-member
 ALL_SUPPORTED_EVENT_TYPES = ['audit', 'page', 'network', 'application', 'alert']
 MAX_EVENTS_PAGE_SIZE = 10000
 MAX_SKIP = 50000
+# The maximal number of events ids saved in the last run for each event type
+DEDUP_WINDOW = 10000
+# The maximal number of events shown in the human readable of netskope-get-events
+MAX_EVENTS_IN_TABLE = 100
+# Every event type holds a worker for its pagination, which waits on at most two page requests (the current page and
+# the one sent ahead), each running on a worker and a connection of its own.
+MAX_CONNECTIONS = 2 * len(ALL_SUPPORTED_EVENT_TYPES)
+MAX_WORKERS = 3 * len(ALL_SUPPORTED_EVENT_TYPES)
 
 ''' CLIENT CLASS '''
 
@@ -25,32 +36,55 @@ class Client(BaseClient):
     Args:
         base_url (str): The base URL of Netskope.
         token (str): The token to authenticate against Netskope API.
+        api_version (str): The API version: v1 or v2.
         validate_certificate (bool): Specifies whether to verify the SSL certificate or not.
         proxy (bool): Specifies if to use XSOAR proxy settings.
     """
 
     def __init__(self, base_url: str, token: str, api_version: str, validate_certificate: bool, proxy: bool):
         super().__init__(base_url, verify=validate_certificate, proxy=proxy)
+        # The API version is resolved once here, so fetching a page does not branch on it
+        self.fetch_page: Callable[[str, dict, int, int, int, bool], Tuple[bool, list]]
         if api_version == 'v1':
             self._session.params['token'] = token  # type: ignore
+            self.fetch_page = self.get_events_page_v1
         else:
-            self.headers = {'Netskope-Api-Token': token}
+            self._session.headers['Netskope-Api-Token'] = token
+            self.fetch_page = self.get_events_page_v2
+            # The full URL of every event type is built once instead of on every page request
+            self._events_urls = {event_type: urljoin(base_url, f'events/data/{event_type}')
+                                 for event_type in ALL_SUPPORTED_EVENT_TYPES}
+
+        # A single adapter is mounted for the client lifetime (instead of passing `retries` to every request, which
+        # mounts a new one each time), so the connections to Netskope are kept alive and shared by all the workers.
+        # Same retry policy as BaseClient._implement_retry(retries=3)
+        methods_key = 'allowed_methods' if hasattr(Retry.DEFAULT, 'allowed_methods') else 'method_whitelist'
+        retry = Retry(total=3, read=3, connect=3, status=3, backoff_factor=5, raise_on_redirect=False,
+                      raise_on_status=False,
+                      **{methods_key: frozenset(['GET', 'POST', 'PUT'])})  # type: ignore[arg-type]
+        if validate_certificate:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS, max_retries=retry)
+        else:
+            adapter = SSLAdapter(verify=False, pool_connections=1,  # type: ignore[arg-type]
+                                 pool_maxsize=MAX_CONNECTIONS, max_retries=retry)  # type: ignore[arg-type]
+        self._session.mount('https://', adapter)
 
     def get_events_request_v1(self, event_type: str, last_run: dict, skip: int = None,
-                              limit: int = None, is_command: bool = False) -> Dict:  # pragma: no cover
+                              limit: int = None, is_command: bool = False,
+                              end_time: int = None) -> Dict:  # pragma: no cover
         body = {
             'starttime': last_run.get(event_type),
-            'endtime': int(datetime.now().timestamp()),
+            'endtime': end_time or int(time.time()),
             'limit': limit if is_command else MAX_EVENTS_PAGE_SIZE,
             'type': event_type,
             'skip': skip
         }
         demisto.debug(f'Get event request body - {body}')
-        response = self._http_request(method='GET', url_suffix='events', json_data=body, retries=3)
+        response = self._http_request(method='GET', url_suffix='events', json_data=body)
         return response
 
     def get_alerts_request_v1(self, last_run: dict, skip: int = None, limit: int = None,
-                              is_command: bool = False) -> list[Any] | Any:  # pragma: no cover
+                              is_command: bool = False, end_time: int = None) -> list[Any] | Any:  # pragma: no cover
         """
         Get alerts generated by Netskope, including policy, DLP, and watch list alerts.
 
@@ -59,6 +93,7 @@ class Client(BaseClient):
             skip (int): Skip over some events (useful for pagination in combination with limit).
             limit (int): Limit the number of events to return.
             is_command (bool): True when running any command besides the automatically triggered fetch mechanism.
+            end_time (int): Get alerts up to this time, defaults to now.
 
         Returns:
             List[str, Any]: Netskope alerts.
@@ -67,38 +102,98 @@ class Client(BaseClient):
         url_suffix = 'alerts'
         body = {
             'starttime': last_run.get('alert'),
-            'endtime': int(datetime.now().timestamp()),
+            'endtime': end_time or int(time.time()),
             'limit': limit if is_command else MAX_EVENTS_PAGE_SIZE,
             'skip': skip
         }
-        response = self._http_request(method='GET', url_suffix=url_suffix, json_data=body, retries=3)
+        response = self._http_request(method='GET', url_suffix=url_suffix, json_data=body)
         return response
 
     def get_events_request_v2(self, event_type: str, last_run: dict, skip: int = None,
-                              limit: int = None, is_command: bool = False) -> Dict:  # pragma: no cover
+                              limit: int = None, is_command: bool = False,
+                              end_time: int = None) -> Dict:  # pragma: no cover
 
-        url_suffix = f'events/data/{event_type}'
         params = {
             'starttime': last_run.get(event_type),
-            'endtime': int(datetime.now().timestamp()),
+            'endtime': end_time or int(time.time()),
             'limit': limit if is_command else MAX_EVENTS_PAGE_SIZE,
             'skip': skip
         }
-        response = self._http_request(method='GET', url_suffix=url_suffix, headers=self.headers,
-                                      params=params, retries=3)
+        response = self._http_request(method='GET', full_url=self._events_urls[event_type], params=params)
         return response
 
+    def get_events_page_v1(self, event_type: str, last_run: dict, end_time: int, skip: int, limit: int,
+                           is_command: bool) -> Tuple[bool, list]:
+        """
+        Get a single page of events of the given type with API v1, in the shape returned by fetch_page.
+
+        Args:
+            event_type (str): The event type to fetch, alerts are fetched from their own endpoint.
+            last_run (dict): Get events from certain time period.
+            end_time (int): Get events up to this time.
+            skip (int): Skip over some events (useful for pagination in combination with limit).
+            limit (int): Limit the number of events to return.
+            is_command (bool): True when running any command besides the automatically triggered fetch mechanism.
+
+        Returns:
+            - Whether the request succeeded.
+            - list of the events in the page.
+        """
+        if event_type == 'alert':
+            response = self.get_alerts_request_v1(last_run, skip, limit, is_command, end_time)
+        else:
+            response = self.get_events_request_v1(event_type, last_run, skip, limit, is_command, end_time)
+
+        if response.get('status') != 'success':  # type: ignore
+            return False, []
+
+        return True, response.get('data', [])  # type: ignore
+
+    def get_events_page_v2(self, event_type: str, last_run: dict, end_time: int, skip: int, limit: int,
+                           is_command: bool) -> Tuple[bool, list]:
+        """
+        Get a single page of events of the given type with API v2, in the shape returned by fetch_page.
+
+        Args:
+            event_type (str): The event type to fetch.
+            last_run (dict): Get events from certain time period.
+            end_time (int): Get events up to this time.
+            skip (int): Skip over some events (useful for pagination in combination with limit).
+            limit (int): Limit the number of events to return.
+            is_command (bool): True when running any command besides the automatically triggered fetch mechanism.
+
+        Returns:
+            - Whether the request succeeded.
+            - list of the events in the page.
+        """
+        response = self.get_events_request_v2(event_type, last_run, skip, limit, is_command, end_time)
+        if response.get('ok') != 1:
+            return False, []
+
+        return True, response.get('result', [])
+
 
 ''' HELPER FUNCTIONS '''
 
 
-def populate_parsing_rule_fields(event: dict, event_type: str):
-    event['source_log_event'] = event_type
-    try:
-        event['_time'] = timestamp_to_datestring(event['timestamp'] * 1000)
-    except TypeError:
-        # modeling rule will default on ingestion time if _time is missing
-        pass
+def summarize_last_run(last_run: dict) -> dict:
+    """
+    Summarize the last run for logging, the saved events ids lists are replaced by their length since they can hold
+    thousands of ids.
+    """
+    return {key: f'{len(value)} ids' if isinstance(value, list) else value for key, value in last_run.items()}
+
+
+def populate_parsing_rule_fields_bulk(events: list, event_type: str):
+    # bound locally since it is looked up once per event
+    to_datestring = timestamp_to_datestring
+    for event in events:
+        event['source_log_event'] = event_type
+        try:
+            event['_time'] = to_datestring(event['timestamp'] * 1000)
+        except (TypeError, KeyError):
+            # modeling rule will default on ingestion time if _time is missing
+            pass
 
 
 def dedup_by_id(last_run: dict, results: list, event_type: str, limit: int):
@@ -115,122 +210,192 @@ def dedup_by_id(last_run: dict, results: list, event_type: str, limit: int):
         - The new last_run (dictionary with the relevant timestamps and the events ids)
 
     """
-    last_run_ids = set(last_run.get(f'{event_type}-ids', []))
+    # dicts are used as insertion ordered sets, so the ids are saved in the order the events were fetched
+    last_run_ids = dict.fromkeys(last_run.get(f'{event_type}-ids', []))
+    last_run_timestamp = last_run[event_type]
+    max_timestamp = last_run_timestamp
     new_events = []
-    new_events_ids = []
+    new_events_ids: dict = {}
     new_last_run = {}
 
-    # Sorting the list to Ascending order according to the timestamp (old one first)
-    sorted_list = list(reversed(results))
-    for event in sorted_list[:limit]:
+    # Going over the list in Ascending order according to the timestamp (old one first), without copying it
+    for event in islice(reversed(results), limit):
         event_timestamp = event.get('timestamp')
         event_id = event.get('_id')
-        event['event_id'] = event_id
 
         # The event we are looking at has the same timestamp as previously fetched events
-        if event_timestamp == last_run[event_type]:
+        if event_timestamp == last_run_timestamp:
             if event_id not in last_run_ids:
+                event['event_id'] = event_id
                 new_events.append(event)
-                last_run_ids.add(event_id)
+                last_run_ids[event_id] = None
 
         # The event has a timestamp we have not yet fetched meaning it is a new event
         else:
+            event['event_id'] = event_id
             new_events.append(event)
-            new_events_ids.append(event_id)
-            # Since the event has a timestamp newer than the saved one, we will update the last run to the
-            # current event time
-            new_last_run[event_type] = event_timestamp
-
-        # If we have received events with a newer time (new_event_ids list) we save them,
-        # otherwise we save the list that include the old ids together with the new event ids.
-        new_last_run[f'{event_type}-ids'] = new_events_ids or last_run_ids
-
-    demisto.debug(f'Setting new last run - {new_last_run}')
+            new_events_ids[event_id] = event_timestamp
+            # Since the event has a timestamp newer than the saved one, the last run will be updated to the
+            # latest event time
+            if event_timestamp and event_timestamp > max_timestamp:
+                max_timestamp = event_timestamp
+
+    new_last_run[event_type] = max_timestamp
+    # Only the ids of the events that share the latest timestamp are checked in the next fetch, so only they are saved.
+    # If we have received events with a newer time we save the ids of the latest ones, otherwise we save the list that
+    # include the old ids together with the new event ids.
+    if max_timestamp == last_run_timestamp:
+        boundary_ids = list(last_run_ids)
+    else:
+        boundary_ids = [event_id for event_id, timestamp in new_events_ids.items() if timestamp == max_timestamp]
+    # When more than DEDUP_WINDOW events share the latest timestamp the oldest ids are dropped, so those events can be
+    # sent again if the next fetch returns them.
+    new_last_run[f'{event_type}-ids'] = boundary_ids[-DEDUP_WINDOW:]
+
+    demisto.debug(f'Setting new last run - {summarize_last_run(new_last_run)}')
     return new_events, new_last_run
 
 
 ''' COMMAND FUNCTIONS '''
 
 
-def test_module(client: Client, api_version: str, last_run: dict, max_fetch: int) -> str:
+def test_module(client: Client, last_run: dict, max_fetch: int) -> str:
 
-    fetch_events_command(client, api_version, last_run, max_fetch=max_fetch, is_command=True)
+    fetch_events_command(client, last_run, max_fetch=max_fetch, is_command=True)
     return 'ok'
 
 
-def get_all_events(client: Client, last_run: dict, limit: int, api_version: str, is_command: bool) -> Tuple[list, dict]:
+def get_events_by_type(client: Client, event_type: str, last_run: dict, end_time: int, limit: int,
+                       is_command: bool, executor: ThreadPoolExecutor) -> list:
+    """
+    Paginate over a single event type and accumulate its events, up to 50,000 events (MAX_SKIP).
+    Once two consecutive full pages are received, the request for the following page is sent ahead on the executor.
+    Args:
+        client: Netskope Client
+        event_type (str): the event type to fetch
+        last_run (dict): the last run, only read from
+        end_time (int): the end of the fetched time range, shared by all the pages
+        limit (int): the number of events to return
+        is_command (bool): Are we running the commands or test_module or not
+        executor (ThreadPoolExecutor): the executor to send the speculative page requests on
+
+    Returns (list): list of the raw events of the given type.
+    """
+    events = []
+    skip = 0
+    page = None  # The request of the page at `skip`, in case it was already sent ahead
+    while True:
+        next_page = None
+        if skip >= 2 * MAX_EVENTS_PAGE_SIZE and skip + MAX_EVENTS_PAGE_SIZE < MAX_SKIP:
+            # The previous pages were full so the one after the current page is most likely needed as well,
+            # sending it now overlaps its round trip with the one of the current page. A single full page is
+            # common, so a page is not sent ahead after only one, to avoid a wasted request per event type.
+            next_page = executor.submit(client.fetch_page, event_type, last_run, end_time,
+                                        skip + MAX_EVENTS_PAGE_SIZE, limit, is_command)
+
+        if page:
+            is_success, results = page.result()
+        else:
+            is_success, results = client.fetch_page(event_type, last_run, end_time, skip, limit, is_command)
+        page = next_page
+
+        if not is_success:
+            break
+
+        demisto.debug(f'The number of received events - {len(results)}')
+        if not results:
+            break
+
+        events.extend(results)
+        if len(results) < MAX_EVENTS_PAGE_SIZE or len(events) >= MAX_SKIP:
+            # This means that we either finished going over all results or that we have reached the
+            # limit of accumulated events.
+            break
+
+        skip += MAX_EVENTS_PAGE_SIZE
+
+    if page:
+        # The page sent ahead is not needed since the pagination is over.
+        page.cancel()
+
+    return events
+
+
+def iter_events_by_type(client: Client, last_run: dict, limit: int,
+                        is_command: bool) -> Iterator[Tuple[str, list, dict]]:
     """
     This Function is doing a pagination to get all events within the given start and end time.
+    The event types are fetched concurrently, each one in its own thread, and the events of every type are yielded
+    as soon as they are ready while the following types are still being fetched.
     Maximum events to get per a fetch call is 50,000 (MAX_SKIP)
     Args:
         client: Netskope Client
         last_run (dict): the last run
         limit (int): the number of events to return
-        api_version (str): The API version: v1 or v2
         is_command (bool): Are we running the commands or test_module or not
 
-    Returns (list): list of all the events from a start time.
+    Yields:
+        - The event type.
+        - list of the new events of the event type.
+        - The new last_run of the event type.
     """
-    events_result = []
-    new_last_run = {}
     if limit is None:
         limit = MAX_EVENTS_PAGE_SIZE
-    for event_type in ALL_SUPPORTED_EVENT_TYPES:
-        events = []
-        skip = 0
-        while True:
-            if api_version == 'v1':
-                if event_type == 'alert':
-                    response = client.get_alerts_request_v1(last_run, skip, limit, is_command)
-                else:
-                    response = client.get_events_request_v1(event_type, last_run, skip, limit, is_command)
-
-                if response.get('status') != 'success':  # type: ignore
-                    break
-
-                results = response.get('data', [])  # type: ignore
-
-            else:  # API version == v2
-                response = client.get_events_request_v2(event_type, last_run, skip, limit, is_command)
-                if response.get('ok') != 1:
-                    break
-
-                results = response.get('result', [])
-
-            demisto.debug(f'The number of received events - {len(results)}')
-            events.extend(results)
-            if len(results) == MAX_EVENTS_PAGE_SIZE:
-                skip += MAX_EVENTS_PAGE_SIZE
-
-            if len(results) < MAX_EVENTS_PAGE_SIZE or not results or len(events) == MAX_SKIP:
-                # This means that we either finished going over all results or that we have reached the
-                # limit of accumulated events.
-                break
-
-        if events:
-            final_events, partial_last_run = dedup_by_id(last_run, events, event_type, limit)
-            # prepare for the next iteration
-            new_last_run.update(partial_last_run)
-            demisto.debug(f'Initialize last run after fetch - {event_type} - {new_last_run[event_type]} \n '
-                          f'Events IDs to send to XSIAM - {new_last_run[f"{event_type}-ids"]}')
+    # All the pages of all the event types are fetched up to the same time, so later pages of an event type
+    # can not contain events newer than its first page.
+    end_time = int(time.time())
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(get_events_by_type, client, event_type, last_run, end_time, limit, is_command,
+                                   executor)
+                   for event_type in ALL_SUPPORTED_EVENT_TYPES]
+
+        # The results are yielded in the order of ALL_SUPPORTED_EVENT_TYPES (and not by completion) so the
+        # events and the new last run do not depend on which request finished first.
+        for event_type, future in zip(ALL_SUPPORTED_EVENT_TYPES, futures):
+            events = future.result()
+            if events:
+                final_events, partial_last_run = dedup_by_id(last_run, events, event_type, limit)
+                demisto.debug(f'Initialize last run after fetch - {event_type} - {partial_last_run[event_type]} \n '
+                              f'Number of events IDs saved - {len(partial_last_run[f"{event_type}-ids"])}')
+
+                populate_parsing_rule_fields_bulk(final_events, event_type)
+                yield event_type, final_events, partial_last_run
+
+
+def get_all_events(client: Client, last_run: dict, limit: int, is_command: bool) -> Tuple[list, dict]:
+    """
+    Get the events of all the event types, see iter_events_by_type.
+    Args:
+        client: Netskope Client
+        last_run (dict): the last run
+        limit (int): the number of events to return
+        is_command (bool): Are we running the commands or test_module or not
 
-            for event in final_events:
-                populate_parsing_rule_fields(event, event_type)
-            events_result.extend(final_events)
+    Returns (list): list of all the events from a start time.
+    """
+    events_result = []
+    new_last_run = {}
+    for _, events, partial_last_run in iter_events_by_type(client, last_run, limit, is_command):
+        events_result.extend(events)
+        new_last_run.update(partial_last_run)
 
     return events_result, new_last_run
 
 
-def get_events_command(client: Client, args: Dict[str, Any], last_run: dict, api_version: str,
+def get_events_command(client: Client, args: Dict[str, Any], last_run: dict,
                        is_command: bool) -> Tuple[CommandResults, list]:
 
     limit = arg_to_number(args.get('limit')) or 50
-    events, _ = get_all_events(client, last_run, api_version=api_version, limit=limit, is_command=is_command)
+    events, _ = get_all_events(client, last_run, limit=limit, is_command=is_command)
 
     for event in events:
-        event['timestamp'] = timestamp_to_datestring(event['timestamp'] * 1000)
+        # _time was already formatted from the same timestamp when the parsing rule fields were populated
+        event['timestamp'] = event.get('_time') or timestamp_to_datestring(event['timestamp'] * 1000)
 
-    readable_output = tableToMarkdown('Events List:', events,
+    title = 'Events List:'
+    if len(events) > MAX_EVENTS_IN_TABLE:
+        title = f'Events List (showing first {MAX_EVENTS_IN_TABLE} of {len(events)}):'
+    readable_output = tableToMarkdown(title, events[:MAX_EVENTS_IN_TABLE],
                                       removeNull=True,
                                       headers=['_id', 'timestamp', 'type', 'access_method', 'app', 'traffic_type'],
                                       headerTransform=string_to_table_header)
@@ -244,13 +409,41 @@ def get_events_command(client: Client, args: Dict[str, Any], last_run: dict, api
     return results, events
 
 
-def fetch_events_command(client, api_version, last_run, max_fetch, is_command):  # pragma: no cover
-    events, new_last_run = get_all_events(client, last_run=last_run, limit=max_fetch, api_version=api_version,
-                                          is_command=is_command)
+def fetch_events_command(client, last_run, max_fetch, is_command):  # pragma: no cover
+    events, new_last_run = get_all_events(client, last_run=last_run, limit=max_fetch, is_command=is_command)
 
     return events, new_last_run
 
 
+def send_events_by_type(client: Client, last_run: dict, max_fetch: int, vendor: str, product: str):
+    """
+    Fetch the events and send them to XSIAM, the events of every event type are sent while the following event types
+    are still being fetched.
+    The last run is saved even if a later event type fails, so the event types which were already sent are not fetched
+    and sent again in the next run.
+    Args:
+        client: Netskope Client
+        last_run (dict): the last run
+        max_fetch (int): the number of events to fetch for each event type
+        vendor (str): the vendor of the events in XSIAM
+        product (str): the product of the events in XSIAM
+    """
+    new_last_run: dict = {}
+    try:
+        for _, events, partial_last_run in iter_events_by_type(client, last_run, max_fetch, is_command=False):
+            send_events_to_xsiam(events=events, vendor=vendor, product=product)
+            new_last_run.update(partial_last_run)
+
+        if not new_last_run:
+            # No new events at all, reporting it to XSIAM as well
+            send_events_to_xsiam(events=[], vendor=vendor, product=product)
+    finally:
+        # The event types which were not sent keep their previous last run
+        new_last_run = last_run | new_last_run
+        demisto.debug(f'Setting the last_run to: {summarize_last_run(new_last_run)}')
+        demisto.setLastRun(new_last_run)
+
+
 ''' MAIN FUNCTION '''
 
 
@@ -269,10 +462,13 @@ def main() -> None:  # pragma: no cover
 
     demisto.debug(f'Command being called is {demisto.command()}')
     try:
+        # The event types are fetched in worker threads which call the server (e.g. demisto.debug) concurrently with
+        # the main thread, so these calls are serialized with a lock.
+        support_multithreading()
         client = Client(base_url, token, api_version, verify_certificate, proxy)
 
         last_run = demisto.getLastRun()
-        demisto.debug(f'Running with the following last_run - {last_run}')
+        demisto.debug(f'Running with the following last_run - {summarize_last_run(last_run)}')
         for event_type in ALL_SUPPORTED_EVENT_TYPES:
             # First Fetch
             if not last_run.get(event_type):
@@ -280,26 +476,23 @@ def main() -> None:  # pragma: no cover
                 last_run_id_key = f'{event_type}-ids'
                 last_run[event_type] = first_fetch
                 last_run[last_run_id_key] = last_run.get(last_run_id_key, [])
-                demisto.debug(f'First Fetch - Initialize last run - {last_run}')
+                demisto.debug(f'First Fetch - Initialize last run - {summarize_last_run(last_run)}')
 
         if demisto.command() == 'test-module':
             # This is the call made when pressing the integration Test button.
-            result = test_module(client, api_version, last_run, max_fetch)   # type: ignore[arg-type]
+            result = test_module(client, last_run, max_fetch)   # type: ignore[arg-type]
             return_results(result)
 
         elif demisto.command() == 'netskope-get-events':
-            results, events = get_events_command(client, demisto.args(), last_run, api_version, is_command=True)
+            results, events = get_events_command(client, demisto.args(), last_run, is_command=True)
 
             if argToBoolean(demisto.args().get('should_push_events', 'true')):
                 send_events_to_xsiam(events=events, vendor=vendor, product=product)  # type: ignore
             return_results(results)
 
         elif demisto.command() == 'fetch-events':
-            demisto.debug(f'Sending request with last run {last_run}')
-            events, new_last_run = fetch_events_command(client, api_version, last_run, max_fetch, is_command=False)
-            send_events_to_xsiam(events=events, vendor=vendor, product=product)
-            demisto.debug(f'Setting the last_run to: {new_last_run}')
-            demisto.setLastRun(new_last_run)
+            demisto.debug(f'Sending request with last run {summarize_last_run(last_run)}')
+            send_events_by_type(client, last_run, max_fetch, vendor, product)  # type: ignore[arg-type]
 
     # Log exceptions and return errors
     except Exception as e:
@@ -29,15 +29,85 @@ def test_dedup_by_id():
         - Make sure only the limited number of events return.
         - Make sure that first comes the event that with the earlier timestamp
         - Make sure that the last_run timestamp has been updated
-        - Make sure that the correct last_run_ids returned.
+        - Make sure that only the ids of the events with the latest timestamp are returned as last_run_ids.
     """
     from NetskopeEventCollector import dedup_by_id
     results = EVENTS_PAGE_RAW_V1.get('data')
     events, new_last_run = dedup_by_id(last_run=FIRST_LAST_RUN, event_type='page', limit=4, results=results)
     assert events[0].get('timestamp') == 1684751415
     assert len(events) == 4
-    assert new_last_run == {'page': 1684751416, 'page-ids': ['3757761212778242bfda29cd', '9e99b72b957416a43222fa7a',
-                                                             '66544bf5fda515f229592644', '98938eb19b4f9bea24ef9a8c']}
+    assert new_last_run == {'page': 1684751416,
+                            'page-ids': [event['_id'] for event in events if event['timestamp'] == 1684751416]}
+    assert '3757761212778242bfda29cd' not in new_last_run['page-ids']
+
+
+def test_dedup_by_id_same_timestamp():
+    """
+    Given:
+        - Results from the API which all share the timestamp saved in the last run
+    When:
+        - Running the dedup_by_id command
+    Then:
+        - Make sure only the events which were not fetched before return.
+        - Make sure the last_run timestamp is kept and the new ids are added to the saved ones.
+    """
+    from NetskopeEventCollector import dedup_by_id
+    last_run = {'page': 1684751416, 'page-ids': ['1']}
+    results = [{'_id': '2', 'timestamp': 1684751416}, {'_id': '1', 'timestamp': 1684751416}]
+    events, new_last_run = dedup_by_id(last_run=last_run, event_type='page', limit=10, results=results)
+    assert [event['_id'] for event in events] == ['2']
+    assert new_last_run == {'page': 1684751416, 'page-ids': ['1', '2']}
+
+
+def test_dedup_by_id_no_saved_ids():
+    """
+    Given:
+        - Results from the API with an event that has the saved timestamp, while no ids were saved
+    When:
+        - Running the dedup_by_id command
+    Then:
+        - Make sure all the events return.
+        - Make sure only the ids of the events with a newer timestamp are saved.
+    """
+    from NetskopeEventCollector import dedup_by_id
+    last_run = {'page': 1684751416, 'page-ids': []}
+    results = [{'_id': '2', 'timestamp': 1684751417}, {'_id': '1', 'timestamp': 1684751416}]
+    events, new_last_run = dedup_by_id(last_run=last_run, event_type='page', limit=10, results=results)
+    assert [event['event_id'] for event in events] == ['1', '2']
+    assert new_last_run == {'page': 1684751417, 'page-ids': ['2']}
+
+
+def test_dedup_by_id_window(mocker):
+    """
+    Given:
+        - Results from the API with more events at the latest timestamp than the dedup window
+    When:
+        - Running the dedup_by_id command
+    Then:
+        - Make sure all the new events return.
+        - Make sure only the ids of the latest events that share the latest timestamp are saved in the last run.
+    """
+    from NetskopeEventCollector import dedup_by_id
+    mocker.patch('NetskopeEventCollector.DEDUP_WINDOW', 2)
+    last_run = {'page': 1684751415, 'page-ids': []}
+    results = [{'_id': 'c', 'timestamp': 1684751418}, {'_id': 'b', 'timestamp': 1684751418},
+               {'_id': 'a', 'timestamp': 1684751418}, {'_id': 'old', 'timestamp': 1684751417}]
+    events, new_last_run = dedup_by_id(last_run=last_run, event_type='page', limit=10, results=results)
+    assert [event['_id'] for event in events] == ['old', 'a', 'b', 'c']
+    assert new_last_run == {'page': 1684751418, 'page-ids': ['b', 'c']}
+
+
+def test_summarize_last_run():
+    """
+    Given:
+        - A last run with saved events ids
+    When:
+        - Running summarize_last_run
+    Then:
+        - Make sure the timestamps are kept and the ids lists are replaced by their length.
+    """
+    from NetskopeEventCollector import summarize_last_run
+    assert summarize_last_run({'page': 1684751416, 'page-ids': ['1', '2']}) == {'page': 1684751416, 'page-ids': '2 ids'}
 
 
 def test_test_module_v2(mocker):
@@ -52,7 +122,7 @@ def test_test_module_v2(mocker):
     from NetskopeEventCollector import test_module
     client = Client(BASE_URL, 'dummy_token', 'v2', False, False)
     mocker.patch.object(client, 'get_events_request_v2', return_value=EVENTS_RAW_V2)
-    results = test_module(client, api_version='v2', last_run=FIRST_LAST_RUN, max_fetch=1)
+    results = test_module(client, last_run=FIRST_LAST_RUN, max_fetch=1)
     assert results == 'ok'
 
 
@@ -65,9 +135,9 @@ def test_populate_parsing_rule_fields():
     Then:
         - Make sure the field _time is populated properly.
     """
-    from NetskopeEventCollector import populate_parsing_rule_fields
+    from NetskopeEventCollector import populate_parsing_rule_fields_bulk
     event = EVENTS_RAW_V2.get('result')[0]
-    populate_parsing_rule_fields(event, event_type='audit')
+    populate_parsing_rule_fields_bulk([event], event_type='audit')
     assert event.get('_time') == '2022-01-18T19:58:07.000Z'
 
 
@@ -86,14 +156,13 @@ def test_get_all_events(mocker):
     client = Client(BASE_URL, 'netskope_token', 'v1', validate_certificate=False, proxy=False)
     mocker.patch.object(client, 'get_alerts_request_v1', return_value=EVENTS_PAGE_RAW_V1)
     mocker.patch.object(client, 'get_events_request_v1', return_value=EVENTS_PAGE_RAW_V1)
-    events, new_last_run = get_all_events(client, FIRST_LAST_RUN, api_version='v1', limit=6, is_command=False)
+    events, new_last_run = get_all_events(client, FIRST_LAST_RUN, limit=6, is_command=False)
     assert len(events) == 25
     assert events[0].get('event_id') == '3757761212778242bfda29cd'
     assert events[0].get('_time') == '2023-05-22T10:30:15.000Z'
     assert new_last_run['page'] == 1684751416
-    assert new_last_run['page-ids'] == ['3757761212778242bfda29cd', '9e99b72b957416a43222fa7a',
-                                        '66544bf5fda515f229592644', '98938eb19b4f9bea24ef9a8c',
-                                        'fe6d7f3a9a1d4e1abce21713']
+    assert new_last_run['page-ids'] == [event['_id'] for event in reversed(EVENTS_PAGE_RAW_V1['data'])
+                                        if event['timestamp'] == 1684751416]
 
 
 def test_get_events_command(mocker):
@@ -110,9 +179,110 @@ def test_get_events_command(mocker):
     from NetskopeEventCollector import get_events_command
     client = Client(BASE_URL, 'dummy_token', 'v2', False, False)
     mocker.patch('NetskopeEventCollector.get_all_events', return_value=[MOCK_ENTRY, {}])
-    results, events = get_events_command(client, args={}, last_run=FIRST_LAST_RUN, api_version='v2',
-                                         is_command=True)
+    results, events = get_events_command(client, args={}, last_run=FIRST_LAST_RUN, is_command=True)
     assert 'Events List' in results.readable_output
     assert len(events) == 9
     assert results.outputs_prefix == 'Netskope.Event'
     assert results.outputs == MOCK_ENTRY
+
+
+def test_get_events_by_type_pagination(mocker):
+    """
+    Given:
+        - An event type with 3 full pages followed by a partial page
+    When:
+        - Running get_events_by_type, which sends the next page ahead once two full pages are received
+    Then:
+        - Make sure all the pages are accumulated in order and the pagination stops after the partial page.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from NetskopeEventCollector import get_events_by_type
+    mocker.patch('NetskopeEventCollector.MAX_EVENTS_PAGE_SIZE', 2)
+    mocker.patch('NetskopeEventCollector.MAX_SKIP', 10)
+    pages = {0: [{'_id': '1'}, {'_id': '2'}], 2: [{'_id': '3'}, {'_id': '4'}], 4: [{'_id': '5'}, {'_id': '6'}],
+             6: [{'_id': '7'}]}
+    client = Client(BASE_URL, 'dummy_token', 'v2', False, False)
+    mocker.patch.object(client, 'get_events_request_v2',
+                        side_effect=lambda event_type, last_run, skip, limit, is_command, end_time:
+                        {'ok': 1, 'result': pages.get(skip, [])})
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        events = get_events_by_type(client, 'page', FIRST_LAST_RUN, end_time=1684751416, limit=2, is_command=False,
+                                    executor=executor)
+    assert [event['_id'] for event in events] == ['1', '2', '3', '4', '5', '6', '7']
+
+
+def test_get_events_by_type_single_full_page(mocker):
+    """
+    Given:
+        - An event type with a single full page
+    When:
+        - Running get_events_by_type
+    Then:
+        - Make sure no page is sent ahead, so only the full page and the following empty page are requested.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from NetskopeEventCollector import get_events_by_type
+    mocker.patch('NetskopeEventCollector.MAX_EVENTS_PAGE_SIZE', 2)
+    mocker.patch('NetskopeEventCollector.MAX_SKIP', 10)
+    client = Client(BASE_URL, 'dummy_token', 'v2', False, False)
+    request = mocker.patch.object(client, 'get_events_request_v2',
+                                  side_effect=lambda event_type, last_run, skip, limit, is_command, end_time:
+                                  {'ok': 1, 'result': [{'_id': '1'}, {'_id': '2'}] if skip == 0 else []})
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        events = get_events_by_type(client, 'page', FIRST_LAST_RUN, end_time=1684751416, limit=2, is_command=False,
+                                    executor=executor)
+    assert len(events) == 2
+    assert sorted(call.args[2] for call in request.call_args_list) == [0, 2]
+
+
+def test_get_events_command_table_preview(mocker):
+    """
+    Given:
+        - netskope-get-events call which returns more events than shown in the human readable
+    When:
+        - Running the get_events_command
+    Then:
+        - Make sure only the first events are shown in the human readable, and the title says so.
+        - Make sure all the events are set in the outputs.
+    """
+    from NetskopeEventCollector import get_events_command
+    client = Client(BASE_URL, 'dummy_token', 'v2', False, False)
+    mocker.patch('NetskopeEventCollector.MAX_EVENTS_IN_TABLE', 2)
+    mocker.patch('NetskopeEventCollector.get_all_events', return_value=[util_load_json('test_data/mock_events.json'), {}])
+    results, events = get_events_command(client, args={}, last_run=FIRST_LAST_RUN, is_command=True)
+    assert 'Events List (showing first 2 of 9)' in results.readable_output
+    assert len(results.outputs) == 9
+
+
+def test_send_events_by_type_failure(mocker):
+    """
+    Given:
+        - A fetch where the first event type returns events and the second one fails
+    When:
+        - Running send_events_by_type
+    Then:
+        - Make sure the error is raised.
+        - Make sure the last run of the event type which was sent is saved, and the rest keep their previous last run.
+    """
+    import demistomock as demisto
+    import pytest
+    from CommonServerPython import DemistoException
+    from NetskopeEventCollector import send_events_by_type
+
+    def get_events(event_type, last_run, skip, limit, is_command, end_time):
+        if event_type == 'audit':
+            return {'ok': 1, 'result': [{'_id': 'audit-1', 'timestamp': 1680182468}]}
+        if event_type == 'page':
+            raise DemistoException('Error in API call [429] - Too Many Requests')
+        return {'ok': 1, 'result': []}
+
+    client = Client(BASE_URL, 'dummy_token', 'v2', False, False)
+    mocker.patch.object(client, 'get_events_request_v2', side_effect=get_events)
+    send_events = mocker.patch('NetskopeEventCollector.send_events_to_xsiam')
+    set_last_run = mocker.patch.object(demisto, 'setLastRun')
+    with pytest.raises(DemistoException):
+        send_events_by_type(client, FIRST_LAST_RUN, max_fetch=10, vendor='netskope', product='netskope')
+
+    assert send_events.call_count == 1
+    assert send_events.call_args.kwargs['events'][0]['_id'] == 'audit-1'
+    assert set_last_run.call_args.args[0] == FIRST_LAST_RUN | {'audit': 1680182468, 'audit-ids': ['audit-1']}